@@ -1,10 +1,11 @@
+import asyncio
 from fastapi import FastAPI, UploadFile, File, Request, HTTPException
 from dotenv import load_dotenv
 from token_service import verify_token
 from user_service import find_user_by_id
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
-from resume_parser import parse_resume
+from resume_parser import parse_resume, read_upload
 
 # Load environment variables (for OPENAI_API_KEY)
 load_dotenv()
@@ -31,11 +32,44 @@ async def health_check():
     return {"status": "ok", "message": "Resume parser is running"}
 
 
+async def authenticate(token: str):
+    """Verify the bearer token and load the matching user"""
+    # Verify token
+    try:
+        decoded_token = await verify_token(token)
+    except Exception as err:
+        raise HTTPException(
+            status_code=401,
+            detail={
+                "error": "Invalid or expired token",
+                "status": 401,
+                "details": str(err)
+            }
+        )
+
+    # Extract userId from token
+    user_id = decoded_token.get("userId")
+    if not user_id:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid token payload", "status": 400}
+        )
+
+    # Find user in database
+    user = await find_user_by_id(user_id)
+    if not user:
+        raise HTTPException(
+            status_code=401,
+            detail={"error": "User does not exist", "status": 401}
+        )
+
+    return user
+
+
 @app.post("/parse-resume")
 async def upload_resume(request: Request, file: UploadFile = File(...)):
     # Check origin
     origin = request.headers.get("origin")
-    print(f"Origin: {origin}")
 
     if not origin or origin not in origins:
         raise HTTPException(status_code=403, detail="Origin not allowed")
@@ -63,38 +97,16 @@ async def upload_resume(request: Request, file: UploadFile = File(...)):
             detail={"error": "Bearer token is missing", "status": 400}
         )
 
-    # Verify token
+    # Read and hash the already-received upload while the user lookup waits on MongoDB
+    upload = asyncio.create_task(read_upload(file))
     try:
-        decoded_token = await verify_token(token)
-    except Exception as err:
-        raise HTTPException(
-            status_code=401,
-            detail={
-                "error": "Invalid or expired token",
-                "status": 401,
-                "details": str(err)
-            }
-        )
-
-    # Extract userId from token
-    user_id = decoded_token.get("userId")
-    if not user_id:
-        raise HTTPException(
-            status_code=400,
-            detail={"error": "Invalid token payload", "status": 400}
-        )
-
-    # Find user in database
-    user = await find_user_by_id(user_id)
-    if not user:
-        raise HTTPException(
-            status_code=401,
-            detail={"error": "User does not exist", "status": 401}
-        )
-
-    # Process the resume if all checks pass
-    content = await file.read()
-    parsed_data = parse_resume(file.filename, content)
+        user = await authenticate(token)
+    except BaseException:
+        # Don't keep reading an upload for a request that's being rejected
+        upload.cancel()
+        raise
+    content, file_hash = await upload
+    parsed_data = await parse_resume(file.filename, content, file_hash)
     
     return {
         "resumeData": parsed_data,
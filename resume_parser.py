@@ -1,26 +1,36 @@
 import os
 import io
+import asyncio
+import copy
 import fitz  # PyMuPDF
-import pdfplumber
 import docx
+import numpy as np
 from PIL import Image
 import json
-import hashlib
+import xxhash
 import pickle
+import orjson
+from cachetools import LRUCache
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import Optional, Any
+from typing import Optional, Any, Dict, List, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from openai import OpenAI
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from openai import AsyncOpenAI
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Pinned snapshot - JSON mode needs gpt-3.5-turbo-1106 or later
+_openai_model = "gpt-3.5-turbo-0125"
+# Caps in-flight OpenAI calls per process so bursts queue here instead of tripping rate limits
+_openai_slots = asyncio.Semaphore(int(os.getenv("OPENAI_MAX_CONCURRENCY", 20)))
 
 # Initialize Redis client (optional - graceful fallback if not available)
 redis_client = None
 try:
     import redis
-    redis_client = redis.Redis(
+    import redis.asyncio as aredis
+    _redis_settings = dict(
         host=os.getenv('REDIS_HOST', 'localhost'),
         port=int(os.getenv('REDIS_PORT', 6379)),
         db=0,
@@ -28,53 +38,100 @@ try:
         socket_connect_timeout=1,
         socket_timeout=1
     )
-    redis_client.ping()  # Test connection
+    # Test connection synchronously - there is no event loop yet at import time
+    with redis.Redis(**_redis_settings) as _probe:
+        _probe.ping()
+    redis_client = aredis.Redis(**_redis_settings)
 except Exception:
     # Redis not available or not installed - use only in-memory cache
     redis_client = None
 
-# In-memory cache as fallback
-_cache = {}
+# In-memory LRU in front of Redis - cached values are immutable per key.
+# Only touched from the event loop, so no locking is needed.
 _max_cache_size = 1000
+_cache = LRUCache(maxsize=_max_cache_size)
 _cache_ttl = 86400 * 7  # 7 days
 
+# Pending background Redis writes - held so they aren't garbage collected mid-flight
+_background_tasks = set()
+
+# Parses currently running, keyed by file hash - concurrent uploads of the same file share one
+_inflight: Dict[str, asyncio.Task] = {}
+
 def _get_file_hash(content: bytes) -> str:
     """Generate hash of file content for cache keys"""
-    return hashlib.md5(content).hexdigest()
+    return xxhash.xxh3_128(content).hexdigest()
+
+async def read_upload(file, chunk_size: int = 1 << 20) -> Tuple[bytes, str]:
+    """Read an upload in chunks, hashing it on the way in - returns (content, file_hash)"""
+    hasher = xxhash.xxh3_128()
+    buf = io.BytesIO()
+    while chunk := await file.read(chunk_size):
+        hasher.update(chunk)
+        buf.write(chunk)
+    return buf.getvalue(), hasher.hexdigest()
 
 def _get_text_hash(text: str) -> str:
     """Generate hash of text content for cache keys"""
-    return hashlib.md5(text.encode('utf-8')).hexdigest()
+    return xxhash.xxh3_128(text.encode('utf-8')).hexdigest()
+
+def _serialize(value: Any) -> bytes:
+    """Serialize a cache value with orjson, falling back to pickle for non-JSON values"""
+    try:
+        return orjson.dumps({"v": value})
+    except TypeError:
+        return pickle.dumps(value)
+
+def _deserialize(data: bytes) -> Any:
+    """Inverse of _serialize - also reads entries written with pickle"""
+    try:
+        return orjson.loads(data)["v"]
+    except orjson.JSONDecodeError:
+        return pickle.loads(data)
+
+async def _get_from_cache(key: str) -> Optional[Any]:
+    """Get item from cache (in-memory first, then Redis)"""
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
 
-def _get_from_cache(key: str) -> Optional[Any]:
-    """Get item from cache (Redis first, then in-memory)"""
     try:
         if redis_client:
-            cached = redis_client.get(key)
+            cached = await redis_client.get(key)
             if cached:
-                return pickle.loads(cached)
+                value = _deserialize(cached)
+                _cache[key] = value
+                return value
     except Exception:
         pass
     
-    return _cache.get(key)
+    return None
 
-def _set_cache(key: str, value: Any):
-    """Set item in cache (both Redis and in-memory)"""
+async def _async_set_cache(key: str, value: Any):
+    """Write a single item to Redis in the background, ignoring failures"""
     try:
-        if redis_client:
-            redis_client.setex(key, _cache_ttl, pickle.dumps(value))
+        # Serializing a few KB with orjson takes microseconds - cheaper inline than via an executor
+        await redis_client.setex(key, _cache_ttl, _serialize(value))
     except Exception:
         pass
-    
-    # Also store in memory with size limit
-    if len(_cache) >= _max_cache_size:
-        # Remove oldest 25% of items
-        keys_to_remove = list(_cache.keys())[:_max_cache_size // 4]
-        for k in keys_to_remove:
-            del _cache[k]
-    
+
+def _set_cache(key: str, value: Any):
+    """Set item in cache (in-memory now, Redis in the background)"""
     _cache[key] = value
 
+    if redis_client:
+        # Don't hold the request up on the Redis round-trip
+        task = asyncio.create_task(_async_set_cache(key, value))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+# Scanned pages are rendered at this resolution for OCR (PDF default is 72 DPI)
+_ocr_dpi = 150
+# Most pages sent through one EasyOCR detector pass
+_ocr_batch_pages = 4
+# Cropped text lines per EasyOCR recognizer batch
+_ocr_recognizer_batch = 16
+
 # Cache the expensive OCR reader initialization
 @lru_cache(maxsize=1)
 def _get_ocr_reader():
@@ -84,65 +141,80 @@ def _get_ocr_reader():
 # Get cached reader instance
 reader = _get_ocr_reader()
 
-def extract_text_from_resume(filename: str, content: bytes) -> str:
-    """Extract text with caching - same interface as original"""
+async def extract_text_from_resume(filename: str, content: bytes, file_hash: Optional[str] = None) -> str:
+    """Async text extraction with caching - the extractor itself runs in the default executor.
+
+    file_hash is the upload's content hash if the caller already has it; computed from content otherwise.
+    """
     # Check cache first
-    file_hash = _get_file_hash(content)
+    file_hash = file_hash or _get_file_hash(content)
     cache_key = f"text_extract:{file_hash}"
     
-    cached_text = _get_from_cache(cache_key)
+    cached_text = await _get_from_cache(cache_key)
     if cached_text is not None:
         return cached_text
 
     ext = os.path.splitext(filename)[1].lower()
 
     if ext == ".pdf":
-        text = extract_text_from_pdf(content)
+        extract = extract_text_from_pdf
     elif ext == ".docx":
-        text = extract_text_from_docx(content)
+        extract = extract_text_from_docx
     elif ext in [".png", ".jpg", ".jpeg"]:
-        text = extract_text_from_image(content)
+        extract = extract_text_from_image
     else:
         return "Unsupported file format."
+
+    # Extraction (PDF parsing, OCR) is blocking CPU work, so keep it off the event loop
+    loop = asyncio.get_running_loop()
+    text = await loop.run_in_executor(None, extract, content)
     
     # Cache the result
     _set_cache(cache_key, text)
     return text
 
+def _render_page(page) -> Any:
+    """Render a PDF page to a grayscale numpy array for OCR"""
+    # Resumes are text - one gray channel is enough and a third of the RGB bytes
+    zoom = _ocr_dpi / 72
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+
+def _ocr_images(images: List[Any]) -> List[List[str]]:
+    """OCR several page images with the cached reader, returning text lines per image in order"""
+    if not images:
+        return []
+
+    # Same-sized pages (the normal case for one PDF) go through EasyOCR's batched pipeline.
+    # The detector runs a whole call as one forward pass, so cap pages per call to bound memory.
+    if len({img.shape for img in images}) == 1:
+        results = []
+        for start in range(0, len(images), _ocr_batch_pages):
+            group = images[start:start + _ocr_batch_pages]
+            results.extend(reader.readtext_batched(group, detail=0, batch_size=_ocr_recognizer_batch))
+        return results
+
+    # EasyOCR releases the GIL inside its torch ops, so mixed-size pages OCR in parallel
+    max_workers = min(len(images), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda img_np: reader.readtext(img_np, detail=0, batch_size=_ocr_recognizer_batch), images))
+
 def extract_text_from_pdf(content: bytes) -> str:
-    """PDF text extraction with OCR fallback and caching"""
-    file_hash = _get_file_hash(content)
-    
-    text = ""
-    with pdfplumber.open(io.BytesIO(content)) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() or ""
-
-    if not text.strip():
-        # Check OCR cache
-        ocr_cache_key = f"pdf_ocr:{file_hash}"
-        cached_ocr = _get_from_cache(ocr_cache_key)
-        if cached_ocr is not None:
-            return cached_ocr
-        
-        # Perform OCR and cache result
-        text = extract_text_from_pdf_with_ocr(content)
-        _set_cache(ocr_cache_key, text)
+    """PDF text extraction - pages without a text layer fall back to OCR"""
+    page_texts = []
+    scanned = {}  # page index -> rendered image, for pages with no text layer
+    with fitz.open(stream=content, filetype="pdf") as doc:
+        for page in doc:
+            text = page.get_text("text")
+            if not text.strip():
+                scanned[len(page_texts)] = _render_page(page)
+            page_texts.append(text)
 
-    return text
+    # OCR only the pages that need it, all in one batch
+    for index, result in zip(scanned, _ocr_images(list(scanned.values()))):
+        page_texts[index] = "\n".join(result)
 
-def extract_text_from_pdf_with_ocr(content: bytes) -> str:
-    """OCR extraction for PDFs - same as original but using cached reader"""
-    doc = fitz.open(stream=content, filetype="pdf")
-    text = ""
-    for page in doc:
-        pix = page.get_pixmap()
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        import numpy as np
-        img_np = np.array(img)
-        result = reader.readtext(img_np, detail=0)
-        text += "\n".join(result) + "\n"
-    return text
+    return "\n".join(page_texts)
 
 def extract_text_from_docx(content: bytes) -> str:
     """DOCX text extraction - same as original"""
@@ -150,128 +222,120 @@ def extract_text_from_docx(content: bytes) -> str:
     return "\n".join([para.text for para in doc.paragraphs])
 
 def extract_text_from_image(content: bytes) -> str:
-    """Image OCR with caching - same interface as original"""
-    file_hash = _get_file_hash(content)
-    cache_key = f"image_ocr:{file_hash}"
-    
-    # Check cache first
-    cached_text = _get_from_cache(cache_key)
-    if cached_text is not None:
-        return cached_text
-    
-    # Perform OCR using cached reader
+    """Image OCR using the cached reader"""
     image = Image.open(io.BytesIO(content)).convert("RGB")
-    import numpy as np
-    img_np = np.array(image)
+    img_np = np.asarray(image)
     result = reader.readtext(img_np, detail=0)
-    text = "\n".join(result)
-    
-    # Cache the result
-    _set_cache(cache_key, text)
-    return text
+    return "\n".join(result)
+
+# Each resume part is extracted by its own focused prompt so the calls run concurrently.
+# Prompts only describe the fields the model fills in - the fixed section scaffolding is added in code.
+_prompt_template = (
+    "You are a resume parser. Extract {part} from the resume text in the user message.\n"
+    "Return only valid JSON shaped like: {shape}\n"
+    "Use \"\" or null for anything the resume doesn't state."
+)
+
+_prompts = {
+    "personalInfo": _prompt_template.format(
+        part="the candidate's personal information",
+        shape="{targetJobTitle, targetJobDescription, personalInfo: {fullName, jobTitle, email, phone, location, summary}} (all strings)"
+    ),
+    "experience": _prompt_template.format(
+        part="the work experience",
+        shape="{items: [{jobTitle, company, location, startDate, endDate, currentPosition: bool, description}]}"
+    ),
+    "projects": _prompt_template.format(part="the projects", shape="{items: [object]}"),
+    "education": _prompt_template.format(part="the education history", shape="{items: [object]}"),
+    "skills": _prompt_template.format(part="the skills", shape="{items: [object], groups: [object]}"),
+}
+
+_section_templates = {
+    "experience": {"id": "null", "type": "experience", "title": "Work Experience", "order": 0, "hidden": False,
+                   "items": [], "groups": [], "state": {}},
+    "projects": {"id": "null", "type": "projects", "title": "Projects", "order": 1, "hidden": False,
+                 "items": [], "groups": [], "state": {}},
+    "education": {"id": "null", "type": "education", "title": "Education", "order": 2, "hidden": False,
+                  "items": [], "groups": [], "state": {}},
+    "skills": {"id": "null", "type": "skills", "title": "Skills", "order": 3, "format": "grouped",
+               "items": [], "groups": [], "state": {"categoryOrder": [], "viewMode": "categorized"}, "hidden": False},
+}
+
+_personal_info_template = {
+    "targetJobTitle": "",
+    "targetJobDescription": "",
+    "personalInfo": {"fullName": "", "jobTitle": "", "email": "", "phone": "", "location": "", "summary": "",
+                     "profilePicture": None},
+}
+
+async def _extract_part(prompt: str, raw_text: str) -> dict:
+    """Run one focused extraction prompt and parse its JSON reply"""
+    async with _openai_slots:
+        response = await client.chat.completions.create(
+            model=_openai_model,
+            messages=[
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": raw_text}
+            ],
+            temperature=0.2,
+            response_format={"type": "json_object"}
+        )
+    choice = response.choices[0]
+    # JSON mode only guarantees valid JSON if generation wasn't cut off
+    if choice.finish_reason == "length":
+        raise ValueError("OpenAI response was truncated before the JSON was complete")
+    return json.loads(choice.message.content)
+
+def _build_section(section_type: str, extracted: Any) -> dict:
+    """Fill a section's fixed scaffolding with the model's items/groups"""
+    section = copy.deepcopy(_section_templates[section_type])
+    if not isinstance(extracted, dict):
+        return section
+    for field in ("items", "groups"):
+        if isinstance(extracted.get(field), list):
+            section[field] = extracted[field]
+    return section
+
+def _build_personal_info(extracted: Any) -> dict:
+    """Fill the personal info template with the model's string fields"""
+    personal = copy.deepcopy(_personal_info_template)
+    if not isinstance(extracted, dict):
+        return personal
+    for field in ("targetJobTitle", "targetJobDescription"):
+        if isinstance(extracted.get(field), str):
+            personal[field] = extracted[field]
+    info = extracted.get("personalInfo")
+    if isinstance(info, dict):
+        for field in ("fullName", "jobTitle", "email", "phone", "location", "summary"):
+            if isinstance(info.get(field), str):
+                personal["personalInfo"][field] = info[field]
+    return personal
 
-def transform_text_to_resume_data(raw_text: str) -> dict:
-    """Transform text to structured data with OpenAI API caching - same interface"""
+async def transform_text_to_resume_data(raw_text: str) -> dict:
+    """Async transform of text to structured data via concurrent OpenAI calls, with caching"""
     # Check cache first
     text_hash = _get_text_hash(raw_text)
     cache_key = f"openai_transform:{text_hash}"
     
-    cached_result = _get_from_cache(cache_key)
+    cached_result = await _get_from_cache(cache_key)
     if cached_result is not None:
         return cached_result
 
-    prompt = f"""
-You are a resume parser. Extract structured resume data in the following JSON format.
-
-Expected JSON:
-{{
-  "id": null,
-  "targetJobTitle": "",
-  "targetJobDescription": "",
-  "personalInfo": {{
-    "fullName": "",
-    "jobTitle": "",
-    "email": "",
-    "phone": "",
-    "location": "",
-    "summary": "",
-    "profilePicture": null
-  }},
-  "sections": [
-    {{
-      "id": "null",
-      "type": "experience",
-      "title": "Work Experience",
-      "order": 0,
-      "hidden": false,
-      "items": [
-        {{
-          "jobTitle": "",
-          "company": "",
-          "location": "",
-          "startDate": null,
-          "endDate": null,
-          "currentPosition": false,
-          "description": ""
-        }}
-      ],
-      "groups": [],
-      "state": {{}}
-    }},
-    {{
-      "id": "null",
-      "type": "projects",
-      "title": "Projects",
-      "order": 1,
-      "hidden": false,
-      "items": [],
-      "groups": [],
-      "state": {{}}
-    }},
-    {{
-      "id": "null",
-      "type": "education",
-      "title": "Education",
-      "order": 2,
-      "hidden": false,
-      "items": [],
-      "groups": [],
-      "state": {{}}
-    }},
-    {{
-      "id": "null",
-      "type": "skills",
-      "title": "Skills",
-      "order": 3,
-      "format": "grouped",
-      "items": [],
-      "groups": [],
-      "state": {{
-        "categoryOrder": [],
-        "viewMode": "categorized"
-      }},
-      "hidden": false
-    }}
-  ]
-}}
-
-Resume Text:
-\"\"\"
-{raw_text}
-\"\"\"
-
-Return only valid JSON.
-"""
-
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2
+        parts = await asyncio.gather(
+            *[_extract_part(prompt, raw_text) for prompt in _prompts.values()]
         )
+        extracted = dict(zip(_prompts.keys(), parts))
 
-        content = response.choices[0].message.content.strip()
-        result = json.loads(content)
+        personal = _build_personal_info(extracted.pop("personalInfo"))
+        result = {
+            "id": None,
+            **personal,
+            "sections": [
+                _build_section(section_type, section)
+                for section_type, section in extracted.items()
+            ]
+        }
         
         # Cache successful result
         _set_cache(cache_key, result)
@@ -282,26 +346,58 @@ Return only valid JSON.
         # Don't cache errors
         return error_result
 
-def parse_resume(filename: str, content: bytes) -> dict:
-    """Main parsing function with full pipeline caching - same interface as original"""
+async def _parse_uncached(filename: str, content: bytes, file_hash: str, cache_key: str) -> dict:
+    """Run the extraction + transform pipeline and cache the complete result"""
+    # Process normally with individual step caching
+    raw_text = await extract_text_from_resume(filename, content, file_hash)
+    structured_data = await transform_text_to_resume_data(raw_text)
+    
+    # Cache the complete result - failures are returned as {"error": ...} and must stay retryable
+    if "error" not in structured_data:
+        _set_cache(cache_key, structured_data)
+    return structured_data
+
+def _finish_inflight(file_hash: str, task: asyncio.Task):
+    """Drop a finished parse from the in-flight map"""
+    if _inflight.get(file_hash) is task:
+        del _inflight[file_hash]
+    # Mark any exception as retrieved so it isn't logged when every caller had gone away
+    if not task.cancelled():
+        task.exception()
+
+async def parse_resume(filename: str, content: bytes, file_hash: Optional[str] = None) -> dict:
+    """Async main parsing function with full pipeline caching.
+
+    file_hash is the upload's content hash (as returned by read_upload); computed from content if omitted.
+    Concurrent calls for the same file_hash share one parse.
+    """
     # Check for complete cached result first
-    file_hash = _get_file_hash(content)
+    file_hash = file_hash or _get_file_hash(content)
     cache_key = f"full_parse:{file_hash}"
     
-    cached_result = _get_from_cache(cache_key)
+    cached_result = await _get_from_cache(cache_key)
     if cached_result is not None:
         return cached_result
-    
-    # Process normally with individual step caching
-    raw_text = extract_text_from_resume(filename, content)
-    structured_data = transform_text_to_resume_data(raw_text)
-    
-    # Cache the complete result
-    _set_cache(cache_key, structured_data)
-    return structured_data
+
+    # Same file already being parsed - join that parse instead of redoing the work
+    task = _inflight.get(file_hash)
+    if task is not None:
+        # Shielded so a disconnecting client can't cancel the parse other requests are sharing
+        result = await asyncio.shield(task)
+        if "error" not in result:
+            return result
+        # Don't hand another request's failure to this one - make (or join) a fresh attempt
+
+    task = _inflight.get(file_hash)
+    if task is None or task.done():
+        task = asyncio.create_task(_parse_uncached(filename, content, file_hash, cache_key))
+        _inflight[file_hash] = task
+        task.add_done_callback(lambda t: _finish_inflight(file_hash, t))
+
+    return await asyncio.shield(task)
 
 # Optional: Cache management functions for monitoring
-def get_cache_stats():
+async def get_cache_stats():
     """Get cache statistics for monitoring"""
     stats = {
         "in_memory_size": len(_cache),
@@ -310,21 +406,20 @@ def get_cache_stats():
     
     if redis_client:
         try:
-            info = redis_client.info()
+            info = await redis_client.info()
             stats["redis_used_memory"] = info.get("used_memory_human", "N/A")
-            stats["redis_keys"] = redis_client.dbsize()
+            stats["redis_keys"] = await redis_client.dbsize()
         except Exception:
             stats["redis_error"] = "Could not get Redis stats"
     
     return stats
 
-def clear_cache():
+async def clear_cache():
     """Clear all caches"""
-    global _cache
     _cache.clear()
     
     if redis_client:
         try:
-            redis_client.flushdb()
+            await redis_client.flushdb()
         except Exception:
             pass
\ No newline at end of file
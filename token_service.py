@@ -1,13 +1,42 @@
 # token_service.py
 import jwt
 import os
-from typing import Dict, Any
+import time
+from functools import lru_cache
+from typing import Dict, Any, Tuple
+from cachetools import LRUCache
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Verified payloads keyed by token, stored as (payload, exp) so entries die with the token
+_token_cache = LRUCache(maxsize=10_000)
+
+# Decoder with verification options built once rather than per call
+_jwt = jwt.PyJWT(options={
+    "verify_exp": True,  # Verify expiration
+    "verify_aud": False,  # Set to True if you use audience claims
+    "verify_iss": False   # Set to True if you use issuer claims
+})
+
+@lru_cache(maxsize=1)
+def _get_jwt_settings() -> Tuple[str, str]:
+    """
+    Read the JWT secret and algorithm from the environment once
+    
+    Resolved lazily because app.py loads .env after importing this module.
+    """
+    # Get JWT secret key from environment variables
+    secret_key = os.getenv("JWT_SECRET_KEY")
+    if not secret_key:
+        raise Exception("JWT_SECRET_KEY environment variable is required")
+    
+    # Get algorithm from environment or use default
+    algorithm = os.getenv("JWT_ALGORITHM", "HS256")
+    return secret_key, algorithm
+
 async def verify_token(token: str) -> Dict[str, Any]:
     """
     Verify JWT token and return decoded payload
@@ -21,26 +50,21 @@ async def verify_token(token: str) -> Dict[str, Any]:
     Raises:
         Exception: If token is invalid, expired, or verification fails
     """
+    cached = _token_cache.get(token)
+    if cached is not None:
+        payload, exp = cached
+        if exp is None or time.time() < exp:
+            return payload
+        del _token_cache[token]
+
     try:
-        # Get JWT secret key from environment variables
-        secret_key = os.getenv("JWT_SECRET_KEY")
-        if not secret_key:
-            raise Exception("JWT_SECRET_KEY environment variable is required")
-        
-        # Get algorithm from environment or use default
-        algorithm = os.getenv("JWT_ALGORITHM", "HS256")
+        secret_key, algorithm = _get_jwt_settings()
         
         # Decode and verify the token
-        decoded_token = jwt.decode(
-            token, 
-            secret_key, 
-            algorithms=[algorithm],
-            verify_exp=True,  # Verify expiration
-            verify_aud=False,  # Set to True if you use audience claims
-            verify_iss=False   # Set to True if you use issuer claims
-        )
+        decoded_token = _jwt.decode(token, secret_key, algorithms=[algorithm])
         
         logger.info(f"Token verified successfully for user: {decoded_token.get('userId', 'unknown')}")
+        _token_cache[token] = (decoded_token, decoded_token.get("exp"))
         return decoded_token
         
     except jwt.ExpiredSignatureError:
@@ -4,6 +4,7 @@ from typing import Optional, Dict, Any
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
 from bson.errors import InvalidId
+from cachetools import TTLCache
 import logging
 
 # Configure logging
@@ -59,26 +60,30 @@ class DatabaseConnection:
 # Global database connection instance
 db_connection = DatabaseConnection()
 
+# Recently found users - the same user typically sends several requests within a token's lifetime
+_user_cache = TTLCache(maxsize=10_000, ttl=60)
+
 async def get_database():
     """Get database instance"""
     return await db_connection.get_database()
 
 async def find_user_by_id(user_id: str) -> Optional[Dict[str, Any]]:
     """
-    Find user by ID in MongoDB
+    Find user by ID in MongoDB (results cached for 60 seconds)
     
     Args:
         user_id (str): User ID to search for
         
     Returns:
-        Optional[Dict[str, Any]]: User document if found, None otherwise
+        Optional[Dict[str, Any]]: User document (only "_id") if found, None otherwise
     """
+    user = _user_cache.get(user_id)
+    if user is not None:
+        return user
+
     try:
         # Get database instance
         db = await get_database()
-        print(f"Connecting to database: {db}")
-        collections = await db.list_collection_names()
-        print(f"Available collections: {collections}")
 
         # Get users collection (change 'users' to your actual collection name if different)
         # Common names: 'users', 'UserV2', 'user'
@@ -91,16 +96,17 @@ async def find_user_by_id(user_id: str) -> Optional[Dict[str, Any]]:
             logger.warning(f"Invalid ObjectId format: {user_id}")
             return None
         
-        # Find user by _id
-        user = await users_collection.find_one({"_id": object_id})
+        # Find user by _id - callers only need the id, so don't fetch the rest of the document
+        user = await users_collection.find_one({"_id": object_id}, projection={"_id": 1})
         
         if user:
             # Convert ObjectId to string for JSON serialization
             user["_id"] = str(user["_id"])
-            logger.info(f"User found: {user_id}")
+            logger.debug("User found: %s", user_id)
+            _user_cache[user_id] = user
             return user
         else:
-            logger.info(f"User not found: {user_id}")
+            logger.debug("User not found: %s", user_id)
             return None
             
     except Exception as e: